@@ -4,26 +4,25 @@ This module creates and configures a Flask application.
 The create_app function is responsible for:
 1. Initializing the Flask application
 2. Loading configuration from a Config object
-3. Setting up Cross-Origin Resource Sharing (CORS)
-4. Initializing database and migration extensions
+3. Setting up Cross-Origin Resource Sharing (CORS) and orjson-backed JSON responses
+4. Initializing database, migration and caching extensions
 5. Registering blueprints for routing
 
 The function returns the configured Flask application instance.
 
 Dependencies:
 - Flask: Web framework
-- Config: Application configuration (imported from config.py)
-- db, migrate: Database and migration extensions (imported from app.extensions)
+- Config, TestingConfig: Application and test suite configuration (imported from config.py)
+- db, migrate, cache: Database, migration and caching extensions (imported from app.extensions)
+- OrjsonProvider: JSON provider backed by orjson (imported from app.extensions)
 - CORS: Cross-Origin Resource Sharing extension
 - bp: Main blueprint for routes (imported from app.routes)
 """
 
 from flask import Flask, send_from_directory
-from config import Config
-from app.extensions import db, migrate
+from config import Config, TestingConfig
+from app.extensions import db, migrate, cache, OrjsonProvider
 from flask_cors import CORS
-from dotenv import load_dotenv
-import os
 
 def create_app(config_class=Config, test_case=False):
     """
@@ -32,26 +31,27 @@ def create_app(config_class=Config, test_case=False):
     This function:
     1. Initializes a new Flask app
     2. Applies configuration from the specified config_class
-    3. Sets up Cross-Origin Resource Sharing (CORS)
-    4. Initializes database and migration extensions
+    3. Sets up Cross-Origin Resource Sharing (CORS) and orjson-backed JSON responses
+    4. Initializes database, migration and caching extensions
     5. Registers the main blueprint for routing
 
     Args:
         config_class (object): The configuration class to use. Defaults to Config.
+        test_case (bool): Whether to use TestingConfig instead of config_class, pointing
+            the app at the test database (TEST_DB_URL, in-memory SQLite by default).
 
     Returns:
         Flask: A configured Flask application instance.
     """
     app = Flask(__name__)
-    app.config.from_object(config_class)
-    if test_case:
-        load_dotenv
-        app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('TEST_DB_URL')
+    app.config.from_object(TestingConfig if test_case else config_class)
     CORS(app)
+    app.json = OrjsonProvider(app)
 
     # Initialize extensions
     db.init_app(app)
     migrate.init_app(app, db)
+    cache.init_app(app)
 
     # Import and register blueprints
     from app.routes import bp as main_bp
@@ -0,0 +1,18 @@
+"""pytest fixtures for the backend tests.
+
+pytest runs the unittest classes in test_kestrel_backend.py as they are, including under
+pytest-xdist (`pytest -n auto app`). Every xdist worker is a separate process, so each one
+builds its own app with its own in-memory SQLite database and the workers share no state.
+"""
+import pytest
+from app.testing import cached_test_app
+
+
+@pytest.fixture(scope='session')
+def app():
+    return cached_test_app()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
@@ -1,10 +1,37 @@
 """This module defines decorators to be used to wrap functions (excluding auth)."""
 from functools import wraps
-from flask import request, jsonify
-from app.models import User
-from app.extensions import db
+from flask import request, jsonify, make_response
+from app.models import User, insert_ignore
+from app.extensions import db, cache
 from auth.auth import requires_auth, get_token_auth_header
 
+@cache.memoize(timeout=300)
+def _user_id_for(auth0_id, username, email):
+    """
+    Return the ID of the user with the given Auth0 ID, creating the user if needed.
+
+    Memoized per Auth0 ID so authenticated requests don't look the user up every time.
+    New users are created with INSERT ... ON CONFLICT DO NOTHING, so concurrent first
+    requests from the same user can't create duplicates or fail on the unique constraint.
+
+    Args:
+        auth0_id (str): The Auth0 ID ('sub' claim) of the user.
+        username (str): The username to use if the user has to be created.
+        email (str): The email address to use if the user has to be created.
+
+    Returns:
+        int: The user's ID.
+    """
+    user_id = db.session.query(User.id).filter_by(auth0_id=auth0_id).scalar()
+    if user_id is None:
+        stmt = insert_ignore(User).values(username=username, email=email, auth0_id=auth0_id).returning(User.id)
+        user_id = db.session.execute(stmt).scalar()
+        if user_id is None:
+            # Another request created the user between our SELECT and INSERT
+            user_id = db.session.query(User.id).filter_by(auth0_id=auth0_id).scalar()
+        db.session.commit()
+    return user_id
+
 def user_required(f):
     """
     A decorator that ensures a user exists for the given Auth0 ID.
@@ -12,8 +39,8 @@ def user_required(f):
     This decorator wraps another function and does the following:
     1. Requires authentication using the 'get:games' permission.
     2. Retrieves the Auth0 ID from the authentication payload.
-    3. Looks up the user in the database using the Auth0 ID.
-    4. If the user doesn't exist, creates a new user with information from the payload.
+    3. Resolves the Auth0 ID to a user ID (cached), creating the user from the payload if needed.
+    4. Loads the user object by primary key.
     5. Adds the user object to the kwargs of the wrapped function.
 
     Args:
@@ -27,21 +54,42 @@ def user_required(f):
     @wraps(f)
     @requires_auth('get:games')
     def decorated_function(payload, *args, **kwargs):
-        auth0_id = payload['sub']
-        user = User.query.filter_by(auth0_id=auth0_id).first()
-        
-        if not user:
-            # Create a new user
-            new_user = User(
-                username=payload.get('nickname', 'New User'),
-                email=payload.get('email', 'No email provided'),
-                auth0_id=auth0_id
-            )
-            db.session.add(new_user)
-            db.session.commit()
-            user = new_user
+        user_args = (
+            payload['sub'],
+            payload.get('nickname', 'New User'),
+            payload.get('email', 'No email provided')
+        )
+        user = db.session.get(User, _user_id_for(*user_args))
+
+        if user is None:
+            # The cached ID belongs to a user that has since been deleted
+            cache.delete_memoized(_user_id_for, *user_args)
+            user = db.session.get(User, _user_id_for(*user_args))
 
         # Add the user to the kwargs
         kwargs['user'] = user
         return f(*args, **kwargs)
     return decorated_function
+
+def conditional_response(f):
+    """
+    A decorator that adds an ETag to a view's response and honours conditional requests.
+
+    The ETag is a hash of the response body, so a client that sends it back in
+    If-None-Match gets an empty 304 Not Modified instead of the full payload.
+    Intended for read-only endpoints whose responses are cached.
+
+    Args:
+        f (function): The view function to be decorated.
+
+    Returns:
+        function: The decorated function.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        response = make_response(f(*args, **kwargs))
+        if response.status_code == 200:
+            response.add_etag()
+            response.make_conditional(request)
+        return response
+    return decorated_function
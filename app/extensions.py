@@ -1,5 +1,56 @@
+import sqlite3
+import orjson
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
+from flask_caching import Cache
 
 db = SQLAlchemy()
-migrate = Migrate()
\ No newline at end of file
+migrate = Migrate()
+cache = Cache()
+
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    JSON provider that encodes and decodes with orjson instead of the standard library.
+
+    orjson serializes in native code and produces bytes directly, so responses built with
+    jsonify skip the pure-Python encoder and the intermediate str. Dates and datetimes are
+    encoded natively as ISO 8601 strings, so routes can return them as-is. Types orjson
+    doesn't handle natively fall back to Flask's default serializer.
+
+    Keys are emitted in insertion order rather than sorted, which saves a sort per object
+    and keeps the field order the routes build their dicts in.
+    """
+
+    sort_keys = False
+
+    def _option(self):
+        return orjson.OPT_SORT_KEYS if self.sort_keys else 0
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=self._option()).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, default=self.default, option=self._option()),
+            mimetype=self.mimetype
+        )
+
+@event.listens_for(Engine, 'connect')
+def _enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    """
+    Turn on foreign key enforcement for SQLite connections.
+
+    SQLite ignores foreign keys unless asked to on each connection, and routes rely on
+    them (as they do on Postgres) to reject rows that reference missing users or games.
+    """
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        cursor = dbapi_connection.cursor()
+        cursor.execute('PRAGMA foreign_keys=ON')
+        cursor.close()
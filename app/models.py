@@ -7,25 +7,53 @@ for many-to-many relationships between these entities.
 
 from app.extensions import db
 from datetime import datetime
+from sqlalchemy.dialects import postgresql, sqlite
+
+# Association tables and comments are removed by the database (ON DELETE CASCADE) when their
+# game is deleted, so the Game relationships below don't load them just to delete them
 
 # Association table for the many-to-many relationship between Game and Genre
 game_genre = db.Table('game_genre',
-    db.Column('game_id', db.Integer, db.ForeignKey('game.id'), primary_key=True),
+    db.Column('game_id', db.Integer, db.ForeignKey('game.id', ondelete='CASCADE'), primary_key=True),
     db.Column('genre_id', db.Integer, db.ForeignKey('genre.id'), primary_key=True)
 )
 
 # Association table for the many-to-many relationship between User and Game (owned games)
+# The primary key covers lookups by user; the secondary index covers lookups and aggregation by game
 user_owned_games = db.Table('user_owned_games',
     db.Column('user_id', db.Integer, db.ForeignKey('user.id'), primary_key=True),
-    db.Column('game_id', db.Integer, db.ForeignKey('game.id'), primary_key=True)
+    db.Column('game_id', db.Integer, db.ForeignKey('game.id', ondelete='CASCADE'), primary_key=True),
+    db.Index('ix_user_owned_games_game_id_user_id', 'game_id', 'user_id')
 )
 
 # Association table for the many-to-many relationship between User and Game (now playing)
+# The secondary index lets the top-games aggregation group by game with an index-only scan
 user_now_playing = db.Table('user_now_playing',
     db.Column('user_id', db.Integer, db.ForeignKey('user.id'), primary_key=True),
-    db.Column('game_id', db.Integer, db.ForeignKey('game.id'), primary_key=True)
+    db.Column('game_id', db.Integer, db.ForeignKey('game.id', ondelete='CASCADE'), primary_key=True),
+    db.Index('ix_user_now_playing_game_id_user_id', 'game_id', 'user_id')
 )
 
+def insert_ignore(table):
+    """
+    Build an INSERT for the given table or model that skips rows violating a unique constraint.
+
+    Compiles to INSERT ... ON CONFLICT DO NOTHING on PostgreSQL and SQLite, so callers
+    don't need to SELECT first to avoid duplicates.
+
+    Args:
+        table (Table or Model): The association table or model class to insert into.
+
+    Returns:
+        Insert: An insert statement to which values() can be applied.
+    """
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        return postgresql.insert(table).on_conflict_do_nothing()
+    if dialect == 'sqlite':
+        return sqlite.insert(table).on_conflict_do_nothing()
+    return db.insert(table)
+
 class User(db.Model):
     """
     Represents a user in the database.
@@ -60,7 +88,7 @@ class User(db.Model):
     # Relationships
     owned_games = db.relationship('Game', secondary=user_owned_games, back_populates='owners')
     now_playing = db.relationship('Game', secondary=user_now_playing, back_populates='current_players')
-    user_comments = db.relationship('Comment', back_populates='user', lazy='dynamic')
+    user_comments = db.relationship('Comment', back_populates='user')
 
     def __repr__(self):
         return f'<User {self.username}>'
@@ -105,10 +133,10 @@ class Game(db.Model):
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
-    genres = db.relationship('Genre', secondary=game_genre, back_populates='games')
-    owners = db.relationship('User', secondary=user_owned_games, back_populates='owned_games')
-    current_players = db.relationship('User', secondary=user_now_playing, back_populates='now_playing')
-    game_comments = db.relationship('Comment', back_populates='game', lazy='dynamic')
+    genres = db.relationship('Genre', secondary=game_genre, back_populates='games', passive_deletes=True)
+    owners = db.relationship('User', secondary=user_owned_games, back_populates='owned_games', passive_deletes=True)
+    current_players = db.relationship('User', secondary=user_now_playing, back_populates='now_playing', passive_deletes=True)
+    game_comments = db.relationship('Comment', back_populates='game', passive_deletes=True)
 
     def __repr__(self):
         return f'<Game {self.title}>'
@@ -163,8 +191,11 @@ class Comment(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     content = db.Column(db.Text, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    game_id = db.Column(db.Integer, db.ForeignKey('game.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    game_id = db.Column(db.Integer, db.ForeignKey('game.id', ondelete='CASCADE'), nullable=False)
+
+    # Serves the per-game comment listing in creation order without a separate sort
+    __table_args__ = (db.Index('ix_comment_game_id_created_at', 'game_id', 'created_at'),)
 
     user = db.relationship('User', back_populates='user_comments')
     game = db.relationship('Game', back_populates='game_comments')
@@ -3,25 +3,235 @@ This module defines the main routes for the Flask application.
 It includes endpoints for managing users, games, genres, comments, and user libraries.
 """
 
-from flask import Blueprint, jsonify, request
-from app.models import User, Game, Genre, Comment
-from app.extensions import db
+from flask import Blueprint, abort, current_app, jsonify, request, stream_with_context
+from flask_sqlalchemy.record_queries import get_recorded_queries
+from app.models import User, Game, Genre, Comment, user_owned_games, user_now_playing, insert_ignore
+from app.extensions import db, cache
 from app.search_engine import IGDBApi
 from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import load_only, raiseload, selectinload
 import datetime
 from datetime import date
+import orjson
 from auth.auth import AuthError, requires_auth
-from app.decorators import user_required
+from app.decorators import user_required, conditional_response
 
 bp = Blueprint('main', __name__)
 
+# Cache keys for read-mostly endpoints, deleted whenever the underlying data changes
+TOP_GAMES_CACHE_KEY = 'top_games'
+GAMES_CACHE_KEY = 'games'
+GENRES_CACHE_KEY = 'genres'
+
+# IGDB results change rarely, so repeated lookups are served from the cache for an hour
+IGDB_CACHE_TIMEOUT = 3600
+
+def _get_or_404(model, ident, options=None):
+    """
+    Fetch a row by primary key through the session's identity map, aborting with 404 if missing.
+
+    Unlike Model.query.get_or_404, no Query object is built, and an instance already
+    loaded earlier in the request is returned without another SELECT.
+
+    Args:
+        model (Model): The model class to load.
+        ident: The primary key value.
+        options (list, optional): Loader options applied when the row is fetched.
+
+    Returns:
+        Model: The loaded instance.
+
+    Raises:
+        werkzeug.exceptions.NotFound: If no row has the given primary key.
+    """
+    obj = db.session.get(model, ident, options=options)
+    if obj is None:
+        abort(404)
+    return obj
+
+def _load_options(*options):
+    """
+    Return the loader options for a route query, guarded against undeclared lazy loads.
+
+    In debug mode, or when SQLALCHEMY_RAISELOAD is set, raiseload('*') is appended so
+    that touching any relationship the query didn't eager-load raises instead of
+    silently issuing one more SELECT per object.
+
+    Args:
+        *options: The eager-loading options the route declares.
+
+    Returns:
+        list: The options to pass to the query.
+    """
+    options = list(options)
+    if current_app.debug or current_app.config.get('SQLALCHEMY_RAISELOAD'):
+        options.append(raiseload('*'))
+    return options
+
+def _in_collection(table, user_id, game_id):
+    """
+    Check whether a (user, game) pair exists in an association table.
+
+    Issues a single EXISTS query instead of loading the user's whole collection
+    just to test membership.
+
+    Args:
+        table (Table): The association table (user_owned_games or user_now_playing).
+        user_id (int): The ID of the user.
+        game_id (int): The ID of the game.
+
+    Returns:
+        bool: True if the game is in the user's collection, False otherwise.
+    """
+    return db.session.query(
+        db.session.query(table).filter_by(user_id=user_id, game_id=game_id).exists()
+    ).scalar()
+
+def _add_to_collection(table, user_id, game_id):
+    """
+    Insert a (user, game) pair into an association table without loading the collection.
+
+    Returns:
+        bool: True if the row was inserted, False if the pair was already present.
+    """
+    result = db.session.execute(insert_ignore(table).values(user_id=user_id, game_id=game_id))
+    return result.rowcount > 0
+
+def _remove_from_collection(table, user_id, game_id):
+    """
+    Delete a (user, game) pair from an association table without loading the collection.
+
+    Returns:
+        bool: True if the row was deleted, False if the pair wasn't present.
+    """
+    result = db.session.execute(
+        table.delete().where(table.c.user_id == user_id, table.c.game_id == game_id)
+    )
+    return result.rowcount > 0
+
+# Rows fetched (and encoded) per batch when streaming a JSON array
+STREAM_BATCH_SIZE = 500
+
+def _collection_games(table, user_id):
+    """
+    Build the query for the id, title and cover art of every game in a user's collection.
+
+    Reads straight through the association table, so the user's relationship is
+    never loaded and only the three serialized Game columns are selected.
+
+    Args:
+        table (Table): The association table (user_owned_games or user_now_playing).
+        user_id (int): The ID of the user.
+
+    Returns:
+        Select: A statement yielding rows with id, title and cover_art_url fields.
+    """
+    return db.select(Game.id, Game.title, Game.cover_art_url)\
+        .join(table, table.c.game_id == Game.id)\
+        .where(table.c.user_id == user_id)
+
+def _stream_json_array(stmt):
+    """
+    Stream the rows of a column query as a JSON array of objects.
+
+    Rows are fetched STREAM_BATCH_SIZE at a time and each batch is encoded with orjson
+    as soon as it arrives, so neither the full result nor the full JSON document is
+    ever held in memory and the first bytes go out before the last rows are read.
+
+    Args:
+        stmt (Select): A statement over individual columns.
+
+    Returns:
+        flask.Response: A streamed application/json response.
+    """
+    def generate():
+        result = db.session.execute(stmt.execution_options(yield_per=STREAM_BATCH_SIZE))
+        separator = b'['
+        for batch in result.partitions():
+            # Encode the batch as an array and strip its brackets to splice it into ours
+            yield separator + orjson.dumps([row._asdict() for row in batch])[1:-1]
+            separator = b','
+        yield b'[]' if separator == b'[' else b']'
+
+    return current_app.response_class(stream_with_context(generate()), mimetype='application/json')
+
+_igdb_api = None
+
+def _get_igdb_api():
+    """Return the process-wide IGDBApi client, authenticating with Twitch on first use."""
+    global _igdb_api
+    if _igdb_api is None:
+        _igdb_api = IGDBApi()
+    return _igdb_api
+
+@cache.memoize(timeout=IGDB_CACHE_TIMEOUT)
+def _search_igdb(query):
+    """Search IGDB for games matching the query, memoized per query string."""
+    return _get_igdb_api().search_games(query)
+
+@cache.memoize(timeout=IGDB_CACHE_TIMEOUT)
+def _igdb_game_details(game_id):
+    """Fetch a game's details from IGDB, memoized per IGDB game ID."""
+    return _get_igdb_api().get_game_details(game_id)
+
+def _resolve_genres(names):
+    """
+    Resolve a list of genre names to Genre objects, creating any that don't exist yet.
+
+    Existing genres are fetched with a single IN query and missing ones are created with
+    one multi-row INSERT ... ON CONFLICT DO NOTHING RETURNING, instead of a SELECT and a
+    unit-of-work INSERT per name. Names another request created in the meantime are
+    skipped by the INSERT and picked up with a second SELECT.
+
+    Args:
+        names (list): The genre names to resolve. Duplicates are ignored.
+
+    Returns:
+        list: The Genre objects, in the order the names were given.
+    """
+    names = list(dict.fromkeys(names))
+    if not names:
+        return []
+
+    genres = {genre.name: genre for genre in Genre.query.filter(Genre.name.in_(names)).all()}
+    new_names = [name for name in names if name not in genres]
+    if new_names:
+        stmt = insert_ignore(Genre).values([{'name': name} for name in new_names]).returning(Genre)
+        genres.update((genre.name, genre) for genre in db.session.scalars(stmt))
+        raced = [name for name in new_names if name not in genres]
+        if raced:
+            genres.update((genre.name, genre) for genre in Genre.query.filter(Genre.name.in_(raced)).all())
+
+    return [genres[name] for name in names]
+
+@bp.after_app_request
+def log_slow_queries(response):
+    """
+    Log every query of the current request that exceeded SQLALCHEMY_SLOW_QUERY_THRESHOLD.
+
+    Only active when SQLALCHEMY_RECORD_QUERIES is enabled, since recording adds
+    overhead to every query.
+    """
+    if current_app.config.get('SQLALCHEMY_RECORD_QUERIES'):
+        threshold = current_app.config['SQLALCHEMY_SLOW_QUERY_THRESHOLD']
+        for query in get_recorded_queries():
+            if query.duration >= threshold:
+                current_app.logger.warning(
+                    'Slow query (%.3fs) at %s: %s; parameters: %s',
+                    query.duration, query.location, query.statement, query.parameters
+                )
+    return response
+
 @bp.route('/api/users/<int:user_id>/owned_games', methods=['POST'])
 def add_owned_game(user_id):
     """
     Add a game to a user's owned games list.
 
-    This function retrieves a user and a game based on the provided user_id and game_id,
-    adds the game to the user's owned_games list, and commits the change to the database.
+    This function inserts the (user_id, game_id) pair straight into the user's owned_games
+    list and commits the change to the database. Nothing is loaded first: adding a game
+    that's already listed is a no-op, and a missing user or game is caught by the
+    foreign key constraints.
 
     Args:
         user_id (int): The ID of the user to whom the game will be added.
@@ -35,26 +245,30 @@ def add_owned_game(user_id):
         404: If either the user or the game is not found in the database.
     """
     try:
-        user = User.query.get_or_404(user_id)
         data = request.json
-        game = Game.query.get_or_404(data['game_id'])
-        user.owned_games.append(game)
+        _add_to_collection(user_owned_games, user_id, data['game_id'])
         db.session.commit()
         return jsonify({'message': 'Game added to owned games'}), 200
+    except IntegrityError:
+        # The foreign keys reject a user or game that doesn't exist
+        db.session.rollback()
+        abort(404)
     except Exception as e:
         # If an error occurs, rollback the transaction
         db.session.rollback()
         return jsonify({"status": "error", "message": str(e)}), 500
     finally:
-        db.session.close
+        db.session.close()
 
 @bp.route('/api/users/<int:user_id>/now_playing', methods=['POST'])
 def add_now_playing(user_id):
     """
     Add a game to a user's 'now playing' list.
 
-    This function retrieves a user and a game based on the provided user_id and game_id,
-    adds the game to the user's now_playing list, and commits the change to the database.
+    This function inserts the (user_id, game_id) pair straight into the user's now_playing
+    list and commits the change to the database. Nothing is loaded first: adding a game
+    that's already listed is a no-op, and a missing user or game is caught by the
+    foreign key constraints.
 
     Args:
         user_id (int): The ID of the user to whom the game will be added.
@@ -68,18 +282,21 @@ def add_now_playing(user_id):
         404: If either the user or the game is not found in the database.
     """
     try:
-        user = User.query.get_or_404(user_id)
         data = request.json
-        game = Game.query.get_or_404(data['game_id'])
-        user.now_playing.append(game)
+        _add_to_collection(user_now_playing, user_id, data['game_id'])
         db.session.commit()
+        cache.delete(TOP_GAMES_CACHE_KEY)
         return jsonify({'message': 'Game added to now playing'}), 200
+    except IntegrityError:
+        # The foreign keys reject a user or game that doesn't exist
+        db.session.rollback()
+        abort(404)
     except Exception as e:
         # If an error occurs, rollback the transaction
         db.session.rollback()
         return jsonify({"status": "error", "message": str(e)}), 500
     finally:
-        db.session.close
+        db.session.close()
 
 @bp.route('/api/users/<int:user_id>', methods=['GET'])
 def get_user(user_id):
@@ -107,7 +324,10 @@ def get_user(user_id):
         werkzeug.exceptions.NotFound: If no user with the given user_id is found in the database.
 
     """
-    user = User.query.get_or_404(user_id)
+    user = _get_or_404(User, user_id, options=_load_options(
+        selectinload(User.owned_games).load_only(Game.id, Game.title),
+        selectinload(User.now_playing).load_only(Game.id, Game.title)
+    ))
     return jsonify({
         'id': user.id,
         'username': user.username,
@@ -117,6 +337,8 @@ def get_user(user_id):
     })
 
 @bp.route('/api/games', methods=['GET'])
+@conditional_response
+@cache.cached(key_prefix=GAMES_CACHE_KEY)
 def get_games():
     """
     Retrieve all games from the database.
@@ -136,8 +358,12 @@ def get_games():
     Note:
         This endpoint does not require authentication and returns all games
         stored in the database without any filtering or pagination.
+        The response is cached and invalidated whenever a game is created, updated or deleted.
     """
-    games = Game.query.all()
+    games = Game.query.options(*_load_options(
+        load_only(Game.id, Game.title),
+        selectinload(Game.genres).load_only(Genre.id, Genre.name)
+    )).order_by(Game.id).all()
     return jsonify([{
         'id': game.id,
         'title': game.title,
@@ -185,9 +411,9 @@ def create_game():
             return jsonify({'message': 'Bad request!'}), 400
 
         # Check if the game already exists in our database
-        existing_game = Game.query.filter_by(igdb_id=data['id']).first()
-        if existing_game:
-            return jsonify({'message': 'Game already exists', 'game': existing_game.id}), 409
+        existing_id = db.session.query(Game.id).filter_by(igdb_id=data['id']).scalar()
+        if existing_id is not None:
+            return jsonify({'message': 'Game already exists', 'game': existing_id}), 409
 
         # Create new game
         new_game = Game(
@@ -202,15 +428,12 @@ def create_game():
 
         # Handle genres
         if 'genres' in data:
-            for genre_data in data['genres']:
-                genre = Genre.query.filter_by(name=genre_data['name']).first()
-                if not genre:
-                    genre = Genre(name=genre_data['name'])
-                    db.session.add(genre)
-                new_game.genres.append(genre)
+            new_game.genres = _resolve_genres([genre_data['name'] for genre_data in data['genres']])
 
         db.session.add(new_game)
         db.session.commit()
+        cache.delete(GAMES_CACHE_KEY)
+        cache.delete(GENRES_CACHE_KEY)
 
         return jsonify({
             'id': new_game.id,
@@ -220,7 +443,7 @@ def create_game():
             'cover_art_url': new_game.cover_art_url,
             'franchise': new_game.franchise,
             'studio': new_game.studio,
-            'release_date': new_game.release_date.isoformat() if new_game.release_date else None,
+            'release_date': new_game.release_date,
             'genres': [{'id': genre.id, 'name': genre.name} for genre in new_game.genres]
         }), 201
     except Exception as e:
@@ -228,9 +451,11 @@ def create_game():
         db.session.rollback()
         return jsonify({"status": "error", "message": str(e)}), 500
     finally:
-        db.session.close
+        db.session.close()
 
 @bp.route('/api/genres', methods=['GET'])
+@conditional_response
+@cache.cached(key_prefix=GENRES_CACHE_KEY)
 def get_genres():
     """
     Retrieve all genres from the database.
@@ -247,9 +472,10 @@ def get_genres():
     Note:
         This endpoint does not require authentication and returns all genres
         stored in the database without any filtering or pagination.
+        The response is cached and invalidated whenever genres are created.
     """
-    genres = Genre.query.all()
-    return jsonify([{'id': genre.id, 'name': genre.name} for genre in genres])
+    genres = db.session.query(Genre.id, Genre.name).order_by(Genre.id).all()
+    return jsonify([row._asdict() for row in genres])
 
 @bp.route('/api/genres', methods=['POST'])
 def create_genre():
@@ -279,13 +505,14 @@ def create_genre():
         new_genre = Genre(name=data['name'], description=data.get('description'))
         db.session.add(new_genre)
         db.session.commit()
+        cache.delete(GENRES_CACHE_KEY)
         return jsonify({'id': new_genre.id, 'name': new_genre.name}), 201
     except Exception as e:
         # If an error occurs, rollback the transaction
         db.session.rollback()
         return jsonify({"status": "error", "message": str(e)}), 500
     finally:
-        db.session.close
+        db.session.close()
 
 @bp.route('/api/games/<int:game_id>', methods=['GET'])
 def get_game_details(game_id):
@@ -322,9 +549,16 @@ def get_game_details(game_id):
     Note:
         Comments are ordered by their creation time in ascending order.
     """
-    game = Game.query.get_or_404(game_id)
-
-    comments = Comment.query.filter_by(game_id=game.id).order_by(Comment.created_at.asc()).all()
+    game = _get_or_404(Game, game_id, options=_load_options(
+        load_only(Game.id, Game.title, Game.description, Game.cover_art_url, Game.franchise, Game.studio)
+    ))
+
+    # Plain column rows: no Comment or User objects are built just to be serialized
+    comments = db.session.query(Comment.id, Comment.content, Comment.created_at, User.id, User.username)\
+        .join(Comment.user)\
+        .filter(Comment.game_id == game.id)\
+        .order_by(Comment.created_at.asc())\
+        .all()
 
     return jsonify({
         'id': game.id,
@@ -334,14 +568,14 @@ def get_game_details(game_id):
         'franchise': game.franchise,
         'studio': game.studio,
         'comments': [{
-            'id': comment.id,
-            'content': comment.content,
-            'created_at': comment.created_at.isoformat(),
+            'id': comment_id,
+            'content': content,
+            'created_at': created_at,
             'user': {
-                'id': comment.user.id,
-                'username': comment.user.username
+                'id': user_id,
+                'username': username
             }
-        } for comment in comments]
+        } for comment_id, content, created_at, user_id, username in comments]
     })
 
 @bp.route('/api/games/<int:game_id>/comments', methods=['POST'])
@@ -364,35 +598,47 @@ def add_comment(game_id):
         - content (str): The text content of the comment.
 
     Raises:
-        404: If the game with the specified game_id is not found.
+        400: If user_id or content is missing from the payload.
+        404: If the game with the specified game_id or the user with the given user_id is not found.
 
     Note:
-        This function assumes that the User and Game with the provided IDs exist in the database.
-        It does not perform explicit checks for their existence beyond the try-except block.
+        The user and game are checked up front with cheap single-column queries. If either
+        is deleted before the insert, the foreign key violation is rolled back and reported
+        as a 404 as well; any other error propagates instead of being reported as a 404.
     """
-    try:
-        data = request.json
-        user_id = data['user_id']
-        content = data['content']
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or 'user_id' not in data or 'content' not in data:
+        return jsonify({'message': 'Bad request!'}), 400
+    user_id = data['user_id']
 
-        new_comment = Comment(content=content, user_id=user_id, game_id=game_id)
+    if not db.session.query(db.session.query(Game.id).filter_by(id=game_id).exists()).scalar():
+        return jsonify({"error": "Game not found"}), 404
+    username = db.session.query(User.username).filter_by(id=user_id).scalar()
+    if username is None:
+        return jsonify({"error": "User not found"}), 404
 
-        db.session.add(new_comment)
+    new_comment = Comment(content=data['content'], user_id=user_id, game_id=game_id)
+    db.session.add(new_comment)
+    try:
         db.session.commit()
-    except:
-        return jsonify({"error": "Game not found"}), 404
+    except IntegrityError:
+        # The game or user was deleted after the checks above
+        db.session.rollback()
+        return jsonify({"error": "Game or user not found"}), 404
 
     return jsonify({
         'id': new_comment.id,
         'content': new_comment.content,
-        'created_at': new_comment.created_at.isoformat(),
+        'created_at': new_comment.created_at,
         'user': {
-            'id': new_comment.user.id,
-            'username': new_comment.user.username
+            'id': user_id,
+            'username': username
         }
     }), 201
 
 @bp.route('/api/top-games', methods=['GET'])
+@conditional_response
+@cache.cached(key_prefix=TOP_GAMES_CACHE_KEY)
 def get_top_games():
     """
     Retrieve the top 10 games based on the number of current players.
@@ -416,23 +662,33 @@ def get_top_games():
         The games are ordered by the number of current players in descending order.
         This endpoint does not require authentication and returns the top 10 games
         based on the current player count in the database.
+        The response is cached and invalidated whenever a 'Now Playing' list or a game changes.
     """
-    top_games = db.session.query(Game, func.count(User.id).label('player_count'))\
-        .join(Game.current_players)\
-        .group_by(Game.id)\
-        .order_by(func.count(User.id).desc())\
+    # Count players from the association table alone (an index-only scan on
+    # ix_user_now_playing_game_id_user_id) and only join the 10 winners back to game
+    player_counts = db.session.query(
+            user_now_playing.c.game_id,
+            func.count().label('player_count')
+        )\
+        .group_by(user_now_playing.c.game_id)\
+        .order_by(func.count().desc())\
         .limit(10)\
+        .subquery()
+
+    top_games = db.session.query(
+            Game.id,
+            Game.title,
+            Game.description,
+            Game.cover_art_url,
+            Game.franchise,
+            Game.studio,
+            player_counts.c.player_count
+        )\
+        .join(player_counts, player_counts.c.game_id == Game.id)\
+        .order_by(player_counts.c.player_count.desc())\
         .all()
 
-    return jsonify([{
-        'id': game.id,
-        'title': game.title,
-        'description': game.description,
-        'cover_art_url': game.cover_art_url,
-        'franchise': game.franchise,
-        'studio': game.studio,
-        'player_count': player_count
-    } for game, player_count in top_games])
+    return jsonify([row._asdict() for row in top_games])
 
 @bp.route('/api/users/<string:user_id>/library/<int:game_id>', methods=['POST', 'DELETE'])
 @user_required
@@ -461,18 +717,16 @@ def manage_user_library(user_id,game_id, user=None):
         This function is protected by the @user_required decorator, which
         ensures that only authenticated users can access this endpoint.
     """
-    game = Game.query.get_or_404(game_id)
+    game = _get_or_404(Game, game_id)
 
     try:
         if request.method == 'POST':
-            if game not in user.owned_games:
-                user.owned_games.append(game)
+            if _add_to_collection(user_owned_games, user.id, game.id):
                 db.session.commit()
                 return jsonify({'message': 'Game added to library', 'in_library': True}), 200
             return jsonify({'message': 'Game already in library', 'in_library': True}), 200
         else:
-            if game in user.owned_games:
-                user.owned_games.remove(game)
+            if _remove_from_collection(user_owned_games, user.id, game.id):
                 db.session.commit()
                 return jsonify({'message': 'Game removed from library', 'in_library': False}), 200
             return jsonify({'message': 'Game not in library', 'in_library': False}), 200
@@ -481,7 +735,7 @@ def manage_user_library(user_id,game_id, user=None):
         db.session.rollback()
         return jsonify({"status": "error", "message": str(e)}), 500
     finally:
-        db.session.close
+        db.session.close()
 
 @bp.route('/api/users/<string:user_id>/now_playing/<int:game_id>', methods=['POST', 'DELETE'])
 @user_required
@@ -510,19 +764,19 @@ def manage_now_playing(user_id,game_id, user=None):
         This function is protected by the @user_required decorator, which
         ensures that only authenticated users can access this endpoint.
     """
-    game = Game.query.get_or_404(game_id)
+    game = _get_or_404(Game, game_id)
 
     try:
         if request.method == 'POST':
-            if game not in user.now_playing:
-                user.now_playing.append(game)
+            if _add_to_collection(user_now_playing, user.id, game.id):
                 db.session.commit()
+                cache.delete(TOP_GAMES_CACHE_KEY)
                 return jsonify({'message': 'Game added to Now Playing', 'in_now_playing': True}), 200
             return jsonify({'message': 'Game already in Now Playing', 'in_now_playing': True}), 200
         else:
-            if game in user.now_playing:
-                user.now_playing.remove(game)
+            if _remove_from_collection(user_now_playing, user.id, game.id):
                 db.session.commit()
+                cache.delete(TOP_GAMES_CACHE_KEY)
                 return jsonify({'message': 'Game removed from Now Playing', 'in_now_playing': False}), 200
             return jsonify({'message': 'Game not in Now Playing', 'in_now_playing': False}), 200
     except Exception as e:
@@ -530,7 +784,7 @@ def manage_now_playing(user_id,game_id, user=None):
         db.session.rollback()
         return jsonify({"status": "error", "message": str(e)}), 500
     finally:
-        db.session.close
+        db.session.close()
 
 
 @bp.route('/api/users/game_status/<int:game_id>', methods=['GET'])
@@ -561,10 +815,10 @@ def get_game_status(user, game_id):
         This function is protected by the @user_required decorator, which
         ensures that only authenticated users can access this endpoint.
     """
-    game = Game.query.get_or_404(game_id)
+    game = _get_or_404(Game, game_id)
 
-    in_library = game in user.owned_games
-    in_now_playing = game in user.now_playing
+    in_library = _in_collection(user_owned_games, user.id, game.id)
+    in_now_playing = _in_collection(user_now_playing, user.id, game.id)
 
     return jsonify({
         'in_library': in_library,
@@ -595,14 +849,15 @@ def search_games():
 
     Note:
         This function requires at least 3 characters in the search query to perform a search.
-        The actual search is performed by the IGDBApi class, which is instantiated within this function.
+        The actual search is performed by the IGDBApi class; results are cached per query string,
+        ignoring case and surrounding whitespace.
     """
-    query = request.args.get('query', '')
+    query = request.args.get('query', '').strip()
     if len(query) < 3:
         return jsonify([])
 
-    igdb = IGDBApi()
-    games = igdb.search_games(query)
+    # IGDB search is case-insensitive, so normalize the query to share cache entries
+    games = _search_igdb(query.lower())
     return jsonify(games)
 
 @bp.route('/api/search-games-details/<int:game_id>', methods=['GET'])
@@ -622,11 +877,11 @@ def search_game_details(game_id):
             If the game is not found, returns an error message and a 404 status code.
 
     Note:
-        This function relies on the IGDBApi class to interact with the IGDB API.
+        This function relies on the IGDBApi class to interact with the IGDB API, and caches
+        the details per game ID. Games that aren't found are not cached.
         The actual structure of the returned game details depends on the IGDB API response.
     """
-    igdb = IGDBApi()
-    game_details = igdb.get_game_details(game_id)
+    game_details = _igdb_game_details(game_id)
     if game_details:
         return jsonify(game_details), 200
     else:
@@ -655,11 +910,70 @@ def get_user_library(user):
         This function is protected by the @user_required decorator, which
         ensures that only authenticated users can access this endpoint.
     """
-    return jsonify([{
-        'id': game.id,
-        'title': game.title,
-        'cover_art_url': game.cover_art_url
-    } for game in user.owned_games])
+    return _stream_json_array(_collection_games(user_owned_games, user.id))
+
+@bp.route('/api/users/library/bulk', methods=['POST'])
+@user_required
+def bulk_update_library(user):
+    """
+    Add and remove several games from the user's library in one request.
+
+    This function handles POST requests to the '/api/users/library/bulk' endpoint.
+    All additions are written with a single multi-row INSERT and all removals with a
+    single DELETE, and the changes are committed together.
+
+    Args:
+        user (User): The authenticated user object (provided by @user_required decorator).
+
+    Returns:
+        tuple: A tuple containing a JSON response and HTTP status code.
+            The JSON response includes the number of games added and removed.
+            The HTTP status code is 200 if successful.
+
+    JSON Payload:
+        - add (list, optional): IDs of the games to add to the library.
+        - remove (list, optional): IDs of the games to remove from the library.
+
+    Raises:
+        400: If 'add' or 'remove' is not a list.
+
+    Note:
+        This function is protected by the @user_required decorator, which
+        ensures that only authenticated users can access this endpoint.
+        Unknown game IDs and games already in the library are ignored.
+    """
+    try:
+        data = request.json or {}
+        add_ids = data.get('add', [])
+        remove_ids = data.get('remove', [])
+        if not isinstance(add_ids, list) or not isinstance(remove_ids, list):
+            return jsonify({'message': 'Bad request!'}), 400
+
+        added = 0
+        if add_ids:
+            game_ids = [game_id for (game_id,) in db.session.query(Game.id).filter(Game.id.in_(add_ids))]
+            if game_ids:
+                result = db.session.execute(insert_ignore(user_owned_games).values(
+                    [{'user_id': user.id, 'game_id': game_id} for game_id in game_ids]
+                ))
+                added = result.rowcount
+
+        removed = 0
+        if remove_ids:
+            result = db.session.execute(user_owned_games.delete().where(
+                user_owned_games.c.user_id == user.id,
+                user_owned_games.c.game_id.in_(remove_ids)
+            ))
+            removed = result.rowcount
+
+        db.session.commit()
+        return jsonify({'added': added, 'removed': removed}), 200
+    except Exception as e:
+        # If an error occurs, rollback the transaction
+        db.session.rollback()
+        return jsonify({"status": "error", "message": str(e)}), 500
+    finally:
+        db.session.close()
 
 @bp.route('/api/users/library/<int:game_id>', methods=['DELETE'])
 @user_required
@@ -690,9 +1004,8 @@ def remove_from_library(user, game_id):
         ensures that only authenticated users can access this endpoint.
     """
     try:
-        game = Game.query.get_or_404(game_id)
-        if game in user.owned_games:
-            user.owned_games.remove(game)
+        game = _get_or_404(Game, game_id)
+        if _remove_from_collection(user_owned_games, user.id, game.id):
             db.session.commit()
             return jsonify({'message': 'Game removed from library'}), 200
         return jsonify({'message': 'Game not in library'}), 404
@@ -701,7 +1014,7 @@ def remove_from_library(user, game_id):
         db.session.rollback()
         return jsonify({"status": "error", "message": str(e)}), 500
     finally:
-        db.session.close
+        db.session.close()
 
 @bp.route('/api/users/now_playing', methods=['GET'])
 @user_required
@@ -726,11 +1039,7 @@ def get_user_now_playing(user):
         This function is protected by the @user_required decorator, which
         ensures that only authenticated users can access this endpoint.
     """
-    return jsonify([{
-        'id': game.id,
-        'title': game.title,
-        'cover_art_url': game.cover_art_url
-    } for game in user.now_playing])
+    return _stream_json_array(_collection_games(user_now_playing, user.id))
 
 @bp.route('/api/users/now_playing/<int:game_id>', methods=['DELETE'])
 @user_required
@@ -761,10 +1070,10 @@ def remove_from_now_playing(user, game_id):
         ensures that only authenticated users can access this endpoint.
     """
     try:
-        game = Game.query.get_or_404(game_id)
-        if game in user.now_playing:
-            user.now_playing.remove(game)
+        game = _get_or_404(Game, game_id)
+        if _remove_from_collection(user_now_playing, user.id, game.id):
             db.session.commit()
+            cache.delete(TOP_GAMES_CACHE_KEY)
             return jsonify({'message': 'Game removed from Now Playing'}), 200
         return jsonify({'message': 'Game not in Now Playing'}), 404
     except Exception as e:
@@ -772,7 +1081,7 @@ def remove_from_now_playing(user, game_id):
         db.session.rollback()
         return jsonify({"status": "error", "message": str(e)}), 500
     finally:
-        db.session.close
+        db.session.close()
 
 @bp.route('/api/games/<int:game_id>', methods=['PATCH'])
 @requires_auth('patch:games')
@@ -809,7 +1118,7 @@ def update_game(payload, game_id):
         If genres are provided, all existing genres for the game are replaced with the new ones.
     """
     try:
-        game = Game.query.get_or_404(game_id)
+        game = _get_or_404(Game, game_id, options=_load_options(selectinload(Game.genres)))
         data = request.json
 
         # Update game fields
@@ -826,34 +1135,40 @@ def update_game(payload, game_id):
         if 'release_date' in data:
             game.release_date = date.fromisoformat(data['release_date'])
 
-        # Handle genres
+        # Handle genres: only unlink removed genres and resolve/link added ones,
+        # leaving the association rows of unchanged genres untouched
         if 'genres' in data:
-            game.genres = []  # Clear existing genres
-            for genre_name in data['genres']:
-                genre = Genre.query.filter_by(name=genre_name).first()
-                if not genre:
-                    genre = Genre(name=genre_name)
-                    db.session.add(genre)
-                game.genres.append(genre)
-
-        db.session.commit()
-
-        return jsonify({
+            desired = set(data['genres'])
+            current = {genre.name: genre for genre in game.genres}
+            for name, genre in current.items():
+                if name not in desired:
+                    game.genres.remove(genre)
+            game.genres.extend(_resolve_genres([name for name in data['genres'] if name not in current]))
+
+        # Built before the commit expires the game, so it isn't reloaded just to be serialized
+        updated_game = {
             'id': game.id,
             'title': game.title,
             'description': game.description,
             'cover_art_url': game.cover_art_url,
             'franchise': game.franchise,
             'studio': game.studio,
-            'release_date': game.release_date.isoformat() if game.release_date else None,
+            'release_date': game.release_date,
             'genres': [genre.name for genre in game.genres]
-        }), 200
+        }
+
+        db.session.commit()
+        cache.delete(GAMES_CACHE_KEY)
+        cache.delete(TOP_GAMES_CACHE_KEY)
+        cache.delete(GENRES_CACHE_KEY)
+
+        return jsonify(updated_game), 200
     except Exception as e:
         # If an error occurs, rollback the transaction
         db.session.rollback()
         return jsonify({"status": "error", "message": str(e)}), 500
     finally:
-        db.session.close
+        db.session.close()
 
 @bp.route('/api/games/<int:game_id>', methods=['DELETE'])
 @requires_auth('delete:games')
@@ -880,26 +1195,18 @@ def delete_game(payload, game_id):
 
     Note:
         This function requires authentication with the 'delete:games' permission.
-        It performs the following actions:
-        1. Removes the game from all users' libraries and 'now playing' lists.
-        2. Deletes all comments associated with the game.
-        3. Deletes the game itself from the database.
+        Deleting the game also removes it from all users' libraries and 'now playing'
+        lists and deletes its comments; the database does this through the
+        ON DELETE CASCADE foreign keys in the same statement.
     """
     try:
-        game = Game.query.get_or_404(game_id)
-        
-        # Remove the game from users' libraries and now_playing lists
-        for user in game.owners:
-            user.owned_games.remove(game)
-        for user in game.current_players:
-            user.now_playing.remove(game)
-        
-        # Delete associated comments
-        Comment.query.filter_by(game_id=game_id).delete()
-        
-        # Delete the game
+        game = _get_or_404(Game, game_id)
+
+        # Comments and library/now-playing/genre links are removed by ON DELETE CASCADE
         db.session.delete(game)
         db.session.commit()
+        cache.delete(GAMES_CACHE_KEY)
+        cache.delete(TOP_GAMES_CACHE_KEY)
 
         return jsonify({
             'success': True,
@@ -910,52 +1217,45 @@ def delete_game(payload, game_id):
         db.session.rollback()
         return jsonify({"status": "error", "message": str(e)}), 500
     finally:
-        db.session.close
+        db.session.close()
+
+# Error bodies never change, so they are encoded once at import time
+_ERROR_BODIES = {
+    code: orjson.dumps({"success": False, "error": code, "message": message})
+    for code, message in (
+        (400, "bad request!"),
+        (404, "resource not found!"),
+        (405, "method not allowed!"),
+        (409, "conflict!"),
+        (422, "unprocessable!"),
+        (500, "internal server error!"),
+    )
+}
+
+def _error_response(code):
+    """Return a JSON error response with the pre-encoded body for the given status code."""
+    return current_app.response_class(_ERROR_BODIES[code], status=code, mimetype='application/json')
 
 @bp.errorhandler(400)
-def not_found(error):
-    return jsonify({
-        "success": False, 
-        "error": 400,
-        "message": "bad request!"
-        }), 400
+def bad_request(error):
+    return _error_response(400)
 
 @bp.errorhandler(404)
 def not_found(error):
-    return jsonify({
-        "success": False, 
-        "error": 404,
-        "message": "resource not found!"
-        }), 404
+    return _error_response(404)
 
 @bp.errorhandler(405)
 def not_allowed(error):
-    return jsonify({
-        "success": False,
-        "error": 405,
-        "message": "method not allowed!"
-    })
+    return _error_response(405)
 
 @bp.errorhandler(409)
 def conflict(error):
-    return jsonify({
-        "success": False,
-        "error": 409,
-        "message": "conflict!"
-    })
+    return _error_response(409)
 
 @bp.errorhandler(422)
 def unprocessable(error):
-    return jsonify({
-        "success": False,
-        "error": 422,
-        "message": "unprocessable!"
-    }), 422
+    return _error_response(422)
 
 @bp.errorhandler(500)
 def internal_server_error(error):
-    return jsonify({
-        "success": False,
-        "error": 500,
-        "message": "internal server error!"
-    }), 500
\ No newline at end of file
+    return _error_response(500)
@@ -1,19 +1,52 @@
 """Makes requests to the IGDB API to search for Games. We then use the results to populate our Game objects."""
 
+import logging
 import os
+import threading
+import time
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from typing import List, Dict, Any
 
+# Shared by every IGDBApi instance so connections (and their TLS sessions) to IGDB and
+# Twitch are kept alive and reused instead of re-established for each request.
+# IGDB queries are read-only POSTs, so rate-limited and transient server errors are
+# retried with a short backoff rather than failing the request.
+_retry = Retry(
+    total=3,
+    backoff_factor=0.2,
+    status_forcelist=[429, 500, 502, 503, 504],
+    allowed_methods=Retry.DEFAULT_ALLOWED_METHODS | {'POST'},
+    # Hand the last response back so callers still see the status (raise_for_status etc.)
+    raise_on_status=False,
+)
+_session = requests.Session()
+_session.mount('https://', HTTPAdapter(pool_connections=10, pool_maxsize=20, max_retries=_retry))
+
+logger = logging.getLogger(__name__)
+
 class IGDBApi:
     BASE_URL = "https://api.igdb.com/v4"
+    MAX_IDS_PER_QUERY = 500
+    # Cover image URL template, bound once so building a URL is a single call
+    _COVER_TMPL = "https://images.igdb.com/igdb/image/upload/t_cover_big/{0}.jpg".format
+    # Seconds before expiry at which the cached Twitch token is renewed
+    TOKEN_REFRESH_MARGIN = 60
+
+    _token = None
+    _token_client_id = None
+    _token_expiry = 0.0
+    _token_lock = threading.Lock()
     
     def __init__(self):
         """
         Initialize the IGDBApi class.
 
         This constructor method sets up the necessary authentication for making requests to the IGDB API.
-        It retrieves the client ID and access token from environment variables, authenticates with Twitch
-        to obtain a JWT token, and sets up the headers for subsequent API requests.
+        It retrieves the client ID and access token from environment variables and makes sure a JWT token
+        from Twitch is available; the token is shared by all instances and only renewed when it expires.
 
         Raises:
             ValueError: If IGDB_CLIENT_ID or IGDB_ACCESS_TOKEN environment variables are not set.
@@ -29,26 +62,57 @@ class IGDBApi:
         if not self.client_id or not self.access_token:
             raise ValueError("IGDB_CLIENT_ID and IGDB_ACCESS_TOKEN must be set in .env file")
         
-        # Grab the JWT token for the session by auth'ing through Twitch
-        val_url = 'https://id.twitch.tv/oauth2/token'
+        # Authenticate up front so bad credentials fail here rather than on the first query
+        self._get_token(self.client_id, self.access_token)
 
-        val_params = {
-            'client_id': self.client_id,
-            'client_secret': self.access_token,
-            'grant_type': 'client_credentials'
-        }
+    @classmethod
+    def _get_token(cls, client_id: str, client_secret: str) -> str:
+        """
+        Return a Twitch app access token for IGDB, requesting a new one only when needed.
 
-        response = requests.post(val_url, params=val_params)
+        The token is cached on the class together with its expiry time, so every IGDBApi
+        instance in the process shares it and Twitch is only contacted again shortly before
+        the token expires (or when the credentials change).
 
-        if response.status_code == 200:
-            token = response.json()['access_token']
-        else:
-            raise Exception(f"Authentication failed: {response.text}")
-        
-        # Set headers with the retrieved JWT
-        self.headers = {
+        Args:
+            client_id (str): The Twitch client ID.
+            client_secret (str): The Twitch client secret.
+
+        Returns:
+            str: The access token.
+
+        Raises:
+            Exception: If authentication with Twitch fails.
+        """
+        with cls._token_lock:
+            if (cls._token is None or cls._token_client_id != client_id
+                    or time.time() >= cls._token_expiry - cls.TOKEN_REFRESH_MARGIN):
+                # Grab the JWT token for the session by auth'ing through Twitch
+                val_url = 'https://id.twitch.tv/oauth2/token'
+
+                val_params = {
+                    'client_id': client_id,
+                    'client_secret': client_secret,
+                    'grant_type': 'client_credentials'
+                }
+
+                response = _session.post(val_url, params=val_params)
+
+                if response.status_code != 200:
+                    raise Exception(f"Authentication failed: {response.text}")
+
+                data = orjson.loads(response.content)
+                cls._token = data['access_token']
+                cls._token_client_id = client_id
+                cls._token_expiry = time.time() + data.get('expires_in', 0)
+            return cls._token
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        """The headers for IGDB API requests, carrying the current access token."""
+        return {
             'Client-ID': self.client_id,
-            'Authorization': f'Bearer {token}',
+            'Authorization': f'Bearer {self._get_token(self.client_id, self.access_token)}',
         }
     
     def _make_request(self, endpoint: str, body: str) -> List[Dict[str, Any]]:
@@ -56,14 +120,16 @@ class IGDBApi:
         Make a POST request to the IGDB API.
 
         This method sends a POST request to the specified IGDB API endpoint with the given body.
-        It uses the pre-configured headers for authentication.
+        It uses the pre-configured headers for authentication, and goes through the
+        module's shared session so the connection to IGDB is reused.
 
         Args:
             endpoint (str): The API endpoint to send the request to.
             body (str): The request body containing the query parameters.
 
         Returns:
-            List[Dict[str, Any]]: A list of dictionaries containing the JSON response from the API.
+            List[Dict[str, Any]]: A list of dictionaries containing the JSON response from the API,
+            decoded with orjson straight from the response bytes.
 
         Raises:
             requests.HTTPError: If the HTTP request returns an unsuccessful status code.
@@ -72,9 +138,9 @@ class IGDBApi:
             This method is intended for internal use within the IGDBApi class.
         """
         url = f"{self.BASE_URL}/{endpoint}"
-        response = requests.post(url, headers=self.headers, data=body)
+        response = _session.post(url, headers=self.headers, data=body)
         response.raise_for_status()
-        return response.json()
+        return orjson.loads(response.content)
     
     def _process_cover_url(self, cover: Dict[str, Any]) -> str:
         """
@@ -93,76 +159,121 @@ class IGDBApi:
             The URL is constructed using the IGDB image server format with the
             't_cover_big' size option.
         """
-        if not cover:
-            return None
-        image_id = cover.get('image_id')
-        return f"https://images.igdb.com/igdb/image/upload/t_cover_big/{image_id}.jpg"
+        image_id = cover.get('image_id') if cover else None
+        return self._COVER_TMPL(image_id) if image_id else None
 
     def _process_franchise_names(self, franchises: List[Dict[str, Any]]) -> List[str]:
         """
-        Process franchise names from a list of franchise dictionaries.
-
-        This method takes a list of franchise dictionaries, extracts the franchise IDs,
-        and makes an API request to fetch the corresponding franchise names.
+        Process franchise names from the franchises subquery of a multiquery response.
 
         Args:
-            franchises (List[Dict[str, Any]]): A list of dictionaries containing franchise information.
+            franchises (List[Dict[str, Any]]): The franchise records returned by IGDB.
         Returns:
             List[str]: A list of franchise names.
         """
-        
-        try:
-            franchise_ids = [str(franchise) for franchise in franchises]
-        except:
-            return []
-
-        if not franchise_ids:
-            return []
-        
-        body = f"fields name; where id = ({','.join(franchise_ids)});"
-        try:
-            response = self._make_request('franchises', body)
-            return [franchise['name'] for franchise in response if 'name' in franchise]
-        except Exception as e:
-            print(f"Error fetching franchise names: {e}")
-            return []
+        return [franchise['name'] for franchise in franchises if 'name' in franchise]
     
-    def _process_company_names(self, companies: List[Dict]) -> List[str]:
+    def _process_company_names(self, companies: List[Dict], involved: List[Dict]) -> List[str]:
         """
         Process company names from the list of involved companies.
 
-        This method filters and extracts the names of development studios involved in a game.
-        It makes an additional API request to determine which companies are developers.
+        This method filters and extracts the names of development studios involved in a game,
+        using the developer flags returned by the involved companies subquery.
 
         Args:
             companies (List[Dict]): A list of dictionaries containing company information.
+            involved (List[Dict]): The involved company records (id and developer flag) returned by IGDB.
         Returns:
             List[str]: A list of developer names.
         """
-        
         developers = []
-        company_ids = [str(company['id']) for company in companies if 'id' in company]
-        
-        if not company_ids:
-            return []
+        company_index = {company['id']: company for company in companies if 'id' in company}
+        for company in involved:
+            if company.get('developer'):
+                developer = company_index.get(company.get('id'))
+                if developer:
+                    developers.append(developer['company']['name'])
+        return developers
+
+    @staticmethod
+    def _unique_ids(values) -> List[str]:
+        """
+        Deduplicate IDs for an IGDB where clause, keeping their order.
 
-        body = f"fields developer; where id = ({','.join(company_ids)});"
-        
-        try:
-            response = self._make_request('involved_companies', body)
-            for company in response:
-                print(company)
-                if company.get('developer'):
-                    developer_name = next(developer for developer in companies if developer['id'] == company.get('id'))
-                    developer_name = developer_name['company']['name']
-                    developers.append(developer_name)
-            return developers
-        except Exception as e:
-            print(f"Error fetching company names: {e}")
-            return []
+        Anything that isn't an integer is dropped, so only digits are ever interpolated
+        into the query.
 
+        Args:
+            values: The candidate IDs.
+        Returns:
+            List[str]: The distinct integer IDs, as strings.
+        """
+        ids = (str(value) for value in values if isinstance(value, int) and not isinstance(value, bool))
+        return list(dict.fromkeys(ids))
+
+    def _id_subqueries(self, endpoint: str, name: str, fields: str, ids: List[str]) -> List[str]:
+        """
+        Build multiquery subqueries fetching the given IDs from an endpoint.
+
+        IGDB returns 10 results unless told otherwise and at most MAX_IDS_PER_QUERY, so
+        each subquery asks for one result per ID and the IDs are split across numbered
+        subqueries ("name-0", "name-1", ...) when there are more than that.
+
+        Args:
+            endpoint (str): The IGDB endpoint to query.
+            name (str): The result name prefix for the subqueries.
+            fields (str): The fields to fetch.
+            ids (List[str]): The IDs to fetch.
+        Returns:
+            List[str]: The subqueries, or an empty list if there are no IDs.
+        """
+        return [
+            f'query {endpoint} "{name}-{i}" {{ fields {fields}; '
+            f'where id = ({",".join(chunk)}); limit {len(chunk)}; }};'
+            for i, chunk in enumerate(
+                ids[start:start + self.MAX_IDS_PER_QUERY]
+                for start in range(0, len(ids), self.MAX_IDS_PER_QUERY)
+            )
+        ]
+
+    def _fetch_franchise_and_company_names(self, franchises: List[int], companies: List[Dict]):
+        """
+        Look up a game's franchise names and developer names in a single IGDB request.
+
+        Both lookups are sent as named subqueries of one POST to the multiquery endpoint,
+        instead of one request each to franchises and involved_companies.
+
+        Args:
+            franchises (List[int]): The game's franchise IDs.
+            companies (List[Dict]): The game's involved companies (with company names).
+        Returns:
+            Tuple[List[str], List[str]]: The franchise names and the developer names.
+
+        Raises:
+            requests.HTTPError: If the request fails. It is not swallowed, so the caller's
+            memoized lookup doesn't cache a game with empty franchise and studio names.
+        """
+        companies = companies or []
+        franchise_ids = self._unique_ids(franchises or [])
+        company_ids = self._unique_ids(company.get('id') for company in companies)
+
+        queries = (
+            self._id_subqueries('franchises', 'franchises', 'name', franchise_ids) +
+            self._id_subqueries('involved_companies', 'companies', 'developer', company_ids)
+        )
+        if not queries:
+            return [], []
+
+        response = self._make_request('multiquery', '\n'.join(queries))
+        # Merge the chunks of each lookup back together ("companies-1" -> "companies")
+        results = {}
+        for query in response:
+            results.setdefault(query['name'].split('-')[0], []).extend(query.get('result', []))
+        return (
+            self._process_franchise_names(results.get('franchises', [])),
+            self._process_company_names(companies, results.get('companies', []))
+        )
 
-    
     def search_games(self, query: str, limit: int = 30) -> List[Dict[str, Any]]:
         """
         Search for games in the IGDB database based on a query string.
@@ -190,8 +301,12 @@ class IGDBApi:
         """
         body = f'search "{query}"; fields id,name,summary,first_release_date,cover.image_id; limit {limit};'
         games = self._make_request('games', body)
+        # Inlined _process_cover_url: this runs for every result of every search
+        cover_tmpl = self._COVER_TMPL
         for game in games:
-            game['cover_url'] = self._process_cover_url(game.get('cover'))
+            cover = game.get('cover')
+            image_id = cover.get('image_id') if cover else None
+            game['cover_url'] = cover_tmpl(image_id) if image_id else None
         return games
 
     
@@ -220,7 +335,8 @@ class IGDBApi:
 
         Note:
             This method processes the raw API response to provide more user-friendly
-            data structures for franchises and studios.
+            data structures for franchises and studios. The franchise and studio
+            names are looked up together in one follow-up multiquery request.
         """
         body = f'''
             fields name, summary, first_release_date, cover.image_id, 
@@ -228,13 +344,13 @@ class IGDBApi:
             where id = {game_id};
         '''
         results = self._make_request('games', body)
-        print(results)
         if results:
             game = results[0]
             game['cover_url'] = self._process_cover_url(game.get('cover'))
-            game['franchise'] = self._process_franchise_names(game.get('franchises'))
-            game['studio'] = self._process_company_names(game.get('involved_companies'))
-            print(game)
+            game['franchise'], game['studio'] = self._fetch_franchise_and_company_names(
+                game.get('franchises'), game.get('involved_companies')
+            )
+            logger.debug("IGDB game details: %s", game)
         return game if results else None
 
 # Usage example
@@ -1,134 +1,177 @@
 """Tests for backend endpoints."""
 import unittest
-import json
-from flask import Flask
+import contextlib
 import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from app import create_app
+from app import routes
 from app.extensions import db
-from app.models import User, Game, Genre, Comment
+from app.testing import cached_test_app
+from app.models import User, Game, Comment, user_now_playing
 from dotenv import load_dotenv
-from sqlalchemy.exc import IntegrityError
-import jwt
-import time
-from unittest.mock import patch
+from sqlalchemy import event
+from sqlalchemy.orm import raiseload, scoped_session, sessionmaker
+
+load_dotenv()
+USER_JWT = os.environ.get('USER_JWT')
+ADMIN_JWT = os.environ.get('ADMIN_JWT')
+
+@contextlib.contextmanager
+def count_queries(conn):
+    """Collect the SQL statements executed on conn while the block runs."""
+    queries = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        queries.append(statement)
+
+    event.listen(conn, 'before_cursor_execute', record)
+    try:
+        yield queries
+    finally:
+        event.remove(conn, 'before_cursor_execute', record)
+
+@contextlib.contextmanager
+def swap(obj, attr, new):
+    """Replace obj.attr with new while the block runs; cheaper than mock.patch.object."""
+    old = getattr(obj, attr)
+    setattr(obj, attr, new)
+    try:
+        yield new
+    finally:
+        setattr(obj, attr, old)
+
+class FakeIGDBApi:
+    """Stands in for IGDBApi so search tests don't need Twitch credentials or the network."""
+    def __init__(self, results):
+        self.results = results
+        self.queries = []
+
+    def search_games(self, query):
+        self.queries.append(query)
+        return self.results
+
+def _raise_on_lazy_load(orm_execute_state):
+    # Applies to every ORM query the test session runs, not only the routes that opt in
+    # through SQLALCHEMY_RAISELOAD, so an undeclared relationship load fails the test
+    if orm_execute_state.is_select and not orm_execute_state.is_relationship_load:
+        orm_execute_state.statement = orm_execute_state.statement.options(raiseload('*'))
 
 class KestrelAPITestCase(unittest.TestCase):
-    load_dotenv
+    @classmethod
+    def setUpClass(cls):
+        cls.app = cached_test_app()
+        cls.user_headers = {'Authorization': f'Bearer {USER_JWT}'}
+        cls.admin_headers = {'Authorization': f'Bearer {ADMIN_JWT}'}
+        with cls.app.app_context():
+            db.create_all()
+            # Shared fixtures, committed outside the per-test transactions. The bulk inserts
+            # skip the unit of work; return_defaults writes the new ids back into the dicts.
+            user = {'username': 'testuser', 'email': 'test@example.com', 'auth0_id': 'auth0|123456'}
+            game = {'title': 'Test Game', 'description': 'A test game', 'igdb_id': 12345}
+            db.session.bulk_insert_mappings(User, [user], return_defaults=True)
+            db.session.bulk_insert_mappings(Game, [game], return_defaults=True)
+            db.session.commit()
+            cls.user_id = user['id']
+            cls.user_auth0_id = user['auth0_id']
+            cls.game_id = game['id']
+
+    @classmethod
+    def tearDownClass(cls):
+        with cls.app.app_context():
+            db.drop_all()
+
     def setUp(self):
-        self.app = create_app(test_case=True)
-        self.client = self.app.test_client
+        self.client = self.app.test_client()
         self.app_context = self.app.app_context()
         self.app_context.push()
-        db.create_all()
+        # Run each test inside a transaction that is rolled back afterwards; commits made
+        # by the test or the routes only release a savepoint within it.
+        self.connection = db.engine.connect()
+        self.transaction = self.connection.begin()
+        self.app_session = db.session
+        session_factory = sessionmaker(bind=self.connection, query_cls=db.Query,
+                                       join_transaction_mode='create_savepoint')
+        event.listen(session_factory, 'do_orm_execute', _raise_on_lazy_load)
+        db.session = scoped_session(session_factory)
 
     def tearDown(self):
         db.session.remove()
-        db.drop_all()
+        db.session = self.app_session
+        self.transaction.rollback()
+        self.connection.close()
         self.app_context.pop()
 
-    def get_auth_header(self, token):
-        return {'Authorization': f'Bearer {token}'}
-
-    # Helper method to create a test user
-    def create_test_user(self):
-        with self.app.app_context():
-            user = User.query.filter_by(auth0_id='auth0|123456').first()
-            if user is None:
-                user = User(username='testuser', email='test@example.com', auth0_id='auth0|123456')
-                db.session.add(user)
-                db.session.commit()
-            return user.id  # Return the id instead of the object
-
-
-    # Helper method to create a test game
-    def create_test_game(self):
-        with self.app.app_context():
-            game = Game.query.filter_by(igdb_id=12345).first()
-            if game is None:
-                game = Game(title='Test Game', description='A test game', igdb_id=12345)
-                db.session.add(game)
-                db.session.commit()
-            return game.id  # Return the id instead of the object
-
     # Test get user
     def test_get_user_success(self):
-        with self.app.app_context():
-            user_id = self.create_test_user()
-            user = User.query.get(user_id)
-            res = self.client().get(f'/api/users/{user.id}')
-            data = json.loads(res.data)
-            self.assertEqual(res.status_code, 200)
-            self.assertEqual(data['username'], 'testuser')
+        res = self.client.get(f'/api/users/{self.user_id}')
+        data = res.get_json()
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(data['username'], 'testuser')
 
     def test_get_user_error(self):
-        res = self.client().get('/api/users/9999')  # Non-existent user
+        res = self.client.get('/api/users/9999')  # Non-existent user
         self.assertEqual(res.status_code, 404)
 
-    # Test get games
-    def test_get_game_details_success(self):
-        with self.app.app_context():
-            game = self.create_test_game()
-            game_id = game.id
-            db.session.expunge_all()
-
-            res = self.client().get(f'/api/games/{game_id}')
-            data = json.loads(res.data)
-            self.assertEqual(res.status_code, 200)
-            self.assertEqual(data['title'], 'Test Game')
-
     # Test create game
     def test_create_game_success(self):
-        res = self.client().post('/api/games', json={
+        res = self.client.post('/api/games', json={
             'id': 54321,
             'name': 'New Game',
             'summary': 'A new test game',
             'cover_url': 'http://example.com/cover.jpg'
         })
-        data = json.loads(res.data)
+        data = res.get_json()
         self.assertEqual(res.status_code, 201)
         self.assertTrue(data['id'])
         self.assertEqual(data['title'], 'New Game')
 
     def test_create_game_error(self):
         # Test creating a game with missing required data
-        res = self.client().post('/api/games', json={})
+        res = self.client.post('/api/games', json={})
         self.assertEqual(res.status_code, 400)
 
     # Test get game details
     def test_get_game_details_success(self):
-        with self.app.app_context():
-            game_id = self.create_test_game()
-            game = Game.query.get(game_id)
-            res = self.client().get(f'/api/games/{game.id}')
-            data = json.loads(res.data)
-            self.assertEqual(res.status_code, 200)
-            self.assertEqual(data['title'], 'Test Game')
+        res = self.client.get(f'/api/games/{self.game_id}')
+        data = res.get_json()
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(data['title'], 'Test Game')
+
+    def test_get_game_details_with_comments(self):
+        db.session.add(Comment(content='Great game!', user_id=self.user_id, game_id=self.game_id))
+        db.session.commit()
+
+        res = self.client.get(f'/api/games/{self.game_id}')
+        data = res.get_json()
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(len(data['comments']), 1)
+        self.assertEqual(data['comments'][0]['content'], 'Great game!')
+        self.assertEqual(data['comments'][0]['user']['username'], 'testuser')
 
     def test_get_game_details_error(self):
-        res = self.client().get('/api/games/9999')  # Non-existent game
+        res = self.client.get('/api/games/9999')  # Non-existent game
         self.assertEqual(res.status_code, 404)
 
     # Test add comment
     def test_add_comment_success(self):
-        with self.app.app_context():
-            user_id = self.create_test_user()
-            game_id = self.create_test_game()
-            user = User.query.get(user_id)
-            game = Game.query.get(game_id)
-
-            res = self.client().post(f'/api/games/{game.id}/comments', json={
-                'user_id': user.id,
-                'content': 'Great game!'
-            })
-            data = json.loads(res.data)
-            self.assertEqual(res.status_code, 201)
-            self.assertTrue(data['id'])
-            self.assertEqual(data['content'], 'Great game!')
+        res = self.client.post(f'/api/games/{self.game_id}/comments', json={
+            'user_id': self.user_id,
+            'content': 'Great game!'
+        })
+        data = res.get_json()
+        self.assertEqual(res.status_code, 201)
+        self.assertTrue(data['id'])
+        self.assertEqual(data['content'], 'Great game!')
+
+    def test_add_comment_bad_body(self):
+        for kwargs in ({'data': 'not json', 'content_type': 'text/plain'}, {'json': 5}, {'json': {'content': 'x'}}):
+            with self.subTest(**kwargs):
+                res = self.client.post(f'/api/games/{self.game_id}/comments', **kwargs)
+                self.assertEqual(res.status_code, 400)
+                self.assertEqual(res.get_json(), {'message': 'Bad request!'})
 
     def test_add_comment_error(self):
-        res = self.client().post('/api/games/9999/comments', json={
+        res = self.client.post('/api/games/9999/comments', json={
             'user_id': 1,
             'content': 'Comment on non-existent game'
         })
@@ -136,103 +179,95 @@ class KestrelAPITestCase(unittest.TestCase):
 
     # Test get top games
     def test_get_top_games_success(self):
-        self.create_test_game()
-        res = self.client().get('/api/top-games')
-        data = json.loads(res.data)
+        db.session.execute(user_now_playing.insert().values(user_id=self.user_id, game_id=self.game_id))
+        db.session.commit()
+
+        # The savepoint the route's session opens, plus one SELECT for the ranked games
+        with count_queries(self.connection) as queries:
+            res = self.client.get('/api/top-games')
+        data = res.get_json()
         self.assertEqual(res.status_code, 200)
         self.assertTrue(isinstance(data, list))
+        self.assertEqual(len(data), 1)
+        self.assertLessEqual(len(queries), 2)
 
     # Test manage user library
+    @unittest.skipUnless(USER_JWT, 'USER_JWT is not set')
     def test_manage_user_library_success(self):
-        with self.app.app_context():
-            user_id = self.create_test_user()
-            game_id = self.create_test_game()
-            
-            # Fetch the user and game within this context
-            user = User.query.get(user_id)
-            game = Game.query.get(game_id)
-
-            user_auth0_id = user.auth0_id
-
-            res = self.client().post(f'/api/users/{user_auth0_id}/library/{game_id}',
-                                    headers=self.get_auth_header(os.environ.get('USER_JWT')))
-            data = json.loads(res.data)
-            self.assertEqual(res.status_code, 200)
-            self.assertTrue(data['in_library'])
-
-
+        res = self.client.post(f'/api/users/{self.user_auth0_id}/library/{self.game_id}',
+                               headers=self.user_headers)
+        data = res.get_json()
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(data['in_library'])
 
     def test_manage_user_library_error(self):
-        res = self.client().post('/api/users/non_existent/library/9999')
+        res = self.client.post('/api/users/non_existent/library/9999')
+        self.assertEqual(res.status_code, 401)  # Unauthorized
+
+    def test_bulk_update_library_error(self):
+        res = self.client.post('/api/users/library/bulk', json={'add': [1], 'remove': []})
         self.assertEqual(res.status_code, 401)  # Unauthorized
 
     # Test manage now playing
+    @unittest.skipUnless(USER_JWT, 'USER_JWT is not set')
     def test_manage_now_playing_success(self):
-        with self.app.app_context():
-            user_id = self.create_test_user()
-            game_id = self.create_test_game()
-            user = User.query.get(user_id)
-            game = Game.query.get(game_id)
-
-            res = self.client().post(f'/api/users/{user.auth0_id}/now_playing/{game.id}',
-                                    headers=self.get_auth_header(os.environ.get('USER_JWT')))
-            data = json.loads(res.data)
-            self.assertEqual(res.status_code, 200)
-            self.assertTrue(data['in_now_playing'])
-
-
+        res = self.client.post(f'/api/users/{self.user_auth0_id}/now_playing/{self.game_id}',
+                               headers=self.user_headers)
+        data = res.get_json()
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(data['in_now_playing'])
 
     def test_manage_now_playing_error(self):
-        res = self.client().post('/api/users/non_existent/now_playing/9999')
+        res = self.client.post('/api/users/non_existent/now_playing/9999')
         self.assertEqual(res.status_code, 401)  # Unauthorized
 
     # Test search games
     def test_search_games_success(self):
-        res = self.client().get('/api/search-games?query=test')
-        data = json.loads(res.data)
+        igdb = FakeIGDBApi([{'id': 54321, 'name': 'Test Game', 'cover_url': None}])
+        with swap(routes, '_igdb_api', igdb):
+            res = self.client.get('/api/search-games?query=  Test ')
+        data = res.get_json()
         self.assertEqual(res.status_code, 200)
         self.assertTrue(isinstance(data, list))
+        self.assertEqual(data[0]['name'], 'Test Game')
+        self.assertEqual(igdb.queries, ['test'])
 
     def test_search_games_error(self):
-        res = self.client().get('/api/search-games?query=a')  # Too short query
-        data = json.loads(res.data)
+        res = self.client.get('/api/search-games?query=a')  # Too short query
+        data = res.get_json()
         self.assertEqual(res.status_code, 200)
         self.assertEqual(data, [])
 
+    @unittest.skipUnless(ADMIN_JWT, 'ADMIN_JWT is not set')
     def test_update_game_success(self):
-        with self.app.app_context():
-            game_id = self.create_test_game()
-            game = Game.query.get(game_id)
-
-            res = self.client().patch(f'/api/games/{game.id}',
-                                    json={'title': 'Updated Game Title'},
-                                    headers=self.get_auth_header(os.environ.get('ADMIN_JWT')))
-            data = json.loads(res.data)
-            self.assertEqual(res.status_code, 200)
-            self.assertEqual(data['title'], 'Updated Game Title')
+        res = self.client.patch(f'/api/games/{self.game_id}',
+                                json={'title': 'Updated Game Title'},
+                                headers=self.admin_headers)
+        data = res.get_json()
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(data['title'], 'Updated Game Title')
 
+    @unittest.skipUnless(ADMIN_JWT, 'ADMIN_JWT is not set')
     def test_update_game_error(self):
-        res = self.client().patch('/api/games/9999',
-                                  json={'title': 'Updated Game Title'},
-                                  headers=self.get_auth_header(os.environ.get('ADMIN_JWT')))
+        res = self.client.patch('/api/games/9999',
+                                json={'title': 'Updated Game Title'},
+                                headers=self.admin_headers)
         self.assertEqual(res.status_code, 404)
 
     # Test delete game
+    @unittest.skipUnless(ADMIN_JWT, 'ADMIN_JWT is not set')
     def test_delete_game_success(self):
-        with self.app.app_context():
-            game_id = self.create_test_game()
-            game = Game.query.get(game_id)
-
-            res = self.client().delete(f'/api/games/{game.id}',
-                                    headers=self.get_auth_header(os.environ.get('ADMIN_JWT')))
-            data = json.loads(res.data)
-            self.assertEqual(res.status_code, 200)
-            self.assertTrue(data['success'])
-            self.assertEqual(data['deleted'], game.id)
+        res = self.client.delete(f'/api/games/{self.game_id}',
+                                 headers=self.admin_headers)
+        data = res.get_json()
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(data['success'])
+        self.assertEqual(data['deleted'], self.game_id)
 
+    @unittest.skipUnless(ADMIN_JWT, 'ADMIN_JWT is not set')
     def test_delete_game_error(self):
-        res = self.client().delete('/api/games/9999',
-                                   headers=self.get_auth_header(os.environ.get('ADMIN_JWT')))
+        res = self.client.delete('/api/games/9999',
+                                 headers=self.admin_headers)
         self.assertEqual(res.status_code, 404)
 
 if __name__ == "__main__":
@@ -0,0 +1,26 @@
+"""Shared setup for the backend tests, used by test_kestrel_backend.py and conftest.py."""
+import functools
+from sqlalchemy import event
+from app import create_app
+from app.extensions import db
+
+# Building the app registers every extension and blueprint, so all tests share one instance
+@functools.lru_cache(maxsize=None)
+def cached_test_app():
+    """Return the process-wide test app, built with create_app(test_case=True) on first use."""
+    app = create_app(test_case=True)
+    with app.app_context():
+        if db.engine.dialect.name == 'sqlite':
+            _use_sqlite_transactions(db.engine)
+    return app
+
+def _use_sqlite_transactions(engine):
+    # pysqlite only emits BEGIN before the first write, so a SAVEPOINT would start (and its
+    # RELEASE commit) the transaction each test rolls back. Let SQLAlchemy emit BEGIN itself.
+    @event.listens_for(engine, 'connect')
+    def disable_pysqlite_transactions(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, 'begin')
+    def begin(conn):
+        conn.exec_driver_sql('BEGIN')
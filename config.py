@@ -9,6 +9,25 @@ The Config class includes settings for:
 - SECRET_KEY: A secret key for the application
 - SQLALCHEMY_DATABASE_URI: The database connection URL
 - SQLALCHEMY_TRACK_MODIFICATIONS: A flag to disable SQLAlchemy modification tracking
+- SQLALCHEMY_ENGINE_OPTIONS: Connection pool settings (size and overflow are tunable through
+  DB_POOL_SIZE and DB_MAX_OVERFLOW to match the number of concurrent requests per worker) and
+  the size of SQLAlchemy's compiled statement cache
+- SQLALCHEMY_ECHO: Log every statement, including whether its compiled form came from the
+  statement cache ("[cached since ...]") or had to be compiled ("[generated in ...]") (env flag)
+- SQLALCHEMY_RECORD_QUERIES: Record query timings so slow queries can be logged (env flag)
+- SQLALCHEMY_SLOW_QUERY_THRESHOLD: Queries slower than this many seconds are logged
+- SQLALCHEMY_RAISELOAD: Make eager-loaded route queries raise on any undeclared lazy load,
+  to surface N+1 queries (env flag, always on in debug mode)
+- CACHE_TYPE: The Flask-Caching backend. Defaults to RedisCache when CACHE_REDIS_URL is set and
+  to SimpleCache otherwise. SimpleCache is per-process, so a write only invalidates the worker
+  that handled it; the Procfile runs a single worker unless CACHE_REDIS_URL is set
+- CACHE_REDIS_URL: The Redis connection URL shared by all workers
+- CACHE_DEFAULT_TIMEOUT: The default lifetime of cached responses, in seconds
+
+The TestingConfig class overrides these for the test suite: it uses TEST_DB_URL (an
+in-memory SQLite database by default) without the pool sizing options, always enables
+SQLALCHEMY_RAISELOAD and disables response caching, so an app shared between tests never
+serves another test's data.
 
 Make sure to create a .env file in the root directory of your project with the
 necessary environment variables (SECRET_KEY and DATABASE_URL) before running the application.
@@ -23,4 +42,28 @@ load_dotenv()
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY')
     SQLALCHEMY_DATABASE_URI = os.environ.get('DB_URL')
-    SQLALCHEMY_TRACK_MODIFICATIONS = False
\ No newline at end of file
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 20)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 10)),
+        'pool_pre_ping': True,
+        'pool_recycle': 1800,
+        'query_cache_size': 1200,
+    }
+    SQLALCHEMY_ECHO = os.environ.get('SQLALCHEMY_ECHO', 'false').lower() == 'true'
+    SQLALCHEMY_RECORD_QUERIES = os.environ.get('SQLALCHEMY_RECORD_QUERIES', 'false').lower() == 'true'
+    SQLALCHEMY_SLOW_QUERY_THRESHOLD = float(os.environ.get('SQLALCHEMY_SLOW_QUERY_THRESHOLD', 0.05))
+    SQLALCHEMY_RAISELOAD = os.environ.get('SQLALCHEMY_RAISELOAD', 'false').lower() == 'true'
+    CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL')
+    CACHE_TYPE = os.environ.get('CACHE_TYPE', 'RedisCache' if CACHE_REDIS_URL else 'SimpleCache')
+    CACHE_DEFAULT_TIMEOUT = 60
+
+
+class TestingConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = os.environ.get('TEST_DB_URL', 'sqlite:///:memory:')
+    # In-memory SQLite uses a StaticPool, which rejects the pool sizing options
+    SQLALCHEMY_ENGINE_OPTIONS = {key: value for key, value in Config.SQLALCHEMY_ENGINE_OPTIONS.items()
+                                 if key not in ('pool_size', 'max_overflow')}
+    SQLALCHEMY_RAISELOAD = True
+    CACHE_TYPE = 'NullCache'
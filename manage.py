@@ -1,12 +1,7 @@
 from flask.cli import FlaskGroup
 from app import create_app
-from app.extensions import db
-from app.models import User, Game, Genre, Comment
-from flask_migrate import Migrate
-
-app = create_app()
-migrate = Migrate(app, db)
 
+# The app (and Flask-Migrate, registered in create_app) is only built when a command needs it
 cli = FlaskGroup(create_app=create_app)
 
 if __name__ == '__main__':
@@ -0,0 +1,34 @@
+"""add association table game indexes
+
+Revision ID: 3b9e1c2d7a41
+Revises: f6ed454c9643
+Create Date: 2026-10-15 09:12:44.318207
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b9e1c2d7a41'
+down_revision = 'f6ed454c9643'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Build the indexes outside the migration transaction so Postgres can use
+    # CREATE INDEX CONCURRENTLY and avoid locking the tables against writes.
+    with op.get_context().autocommit_block():
+        op.create_index('ix_user_now_playing_game_id_user_id', 'user_now_playing', ['game_id', 'user_id'],
+                        unique=False, postgresql_concurrently=True)
+        op.create_index('ix_user_owned_games_game_id_user_id', 'user_owned_games', ['game_id', 'user_id'],
+                        unique=False, postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_user_owned_games_game_id_user_id', table_name='user_owned_games',
+                      postgresql_concurrently=True)
+        op.drop_index('ix_user_now_playing_game_id_user_id', table_name='user_now_playing',
+                      postgresql_concurrently=True)
@@ -0,0 +1,34 @@
+"""add comment indexes
+
+Revision ID: 8d2f4a6c1e93
+Revises: 3b9e1c2d7a41
+Create Date: 2026-10-15 10:03:17.652841
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d2f4a6c1e93'
+down_revision = '3b9e1c2d7a41'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Build the indexes outside the migration transaction so Postgres can use
+    # CREATE INDEX CONCURRENTLY and avoid locking the table against writes.
+    with op.get_context().autocommit_block():
+        op.create_index('ix_comment_user_id', 'comment', ['user_id'],
+                        unique=False, postgresql_concurrently=True)
+        op.create_index('ix_comment_game_id_created_at', 'comment', ['game_id', 'created_at'],
+                        unique=False, postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_comment_game_id_created_at', table_name='comment',
+                      postgresql_concurrently=True)
+        op.drop_index('ix_comment_user_id', table_name='comment',
+                      postgresql_concurrently=True)
@@ -0,0 +1,35 @@
+"""cascade game deletes
+
+Revision ID: c47e0b5d9a28
+Revises: 8d2f4a6c1e93
+Create Date: 2026-10-15 14:41:09.218734
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c47e0b5d9a28'
+down_revision = '8d2f4a6c1e93'
+branch_labels = None
+depends_on = None
+
+# Tables whose game_id foreign key was created unnamed, so it has Postgres' default name
+TABLES = ['comment', 'game_genre', 'user_owned_games', 'user_now_playing']
+
+
+def upgrade():
+    # Recreate each game_id foreign key with ON DELETE CASCADE, so deleting a game
+    # removes its comments and association rows in the database.
+    for table in TABLES:
+        op.drop_constraint(f'{table}_game_id_fkey', table, type_='foreignkey')
+        op.create_foreign_key(f'{table}_game_id_fkey', table, 'game',
+                              ['game_id'], ['id'], ondelete='CASCADE')
+
+
+def downgrade():
+    for table in TABLES:
+        op.drop_constraint(f'{table}_game_id_fkey', table, type_='foreignkey')
+        op.create_foreign_key(f'{table}_game_id_fkey', table, 'game',
+                              ['game_id'], ['id'])
@@ -1,18 +1,14 @@
+import shutil
 import subprocess
-import os
 from app import create_app
 
-def run_frontend():
-    os.chdir('kestrel-frontend')
-    subprocess.Popen(['npm', 'start'])
-    os.chdir('..')
+# Resolved once; shutil.which also finds npm.cmd on Windows, which Popen would not
+NPM = shutil.which('npm') or 'npm'
 
-def run_backend(environ, start_response):
-    app = create_app()
-    return app(environ, start_response)
+def run_frontend():
+    subprocess.Popen([NPM, 'start'], cwd='kestrel-frontend')
 
 if __name__ == '__main__':
     #run_frontend()
     app = create_app()
     app.run()
-
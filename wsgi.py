@@ -1,6 +1,12 @@
+# gunicorn's gevent worker (-k gevent, see Procfile) monkey-patches the standard library
+# before loading this module, so requests (IGDB) already yields on socket I/O. psycopg2 talks
+# to PostgreSQL through libpq rather than Python sockets, so it needs its own wait callback.
+from psycogreen.gevent import patch_psycopg
+patch_psycopg()
+
 from app import create_app
 
 app = create_app()
 
 if __name__ == "__main__":
-    app.run()
\ No newline at end of file
+    app.run()